@@ -1,7 +1,8 @@
 import argparse
 import os
 import hashlib
-from eth_keys import keys
+from functools import lru_cache
+import coincurve
 from mnemonic import Mnemonic
 from eth_account import Account
 
@@ -18,6 +19,8 @@ def key_from_privhex(hex_priv: str) -> bytes:
     hex_priv = hex_priv.lower().replace("0x", "")
     return bytes.fromhex(hex_priv)
 
+# BIP39 seed stretching is slow, derive each mnemonic (e.g. DEFAULT_MNEMONIC) once
+@lru_cache(maxsize=None)
 def key_from_mnemonic(mnemonic: str, index: int = 0) -> bytes:
     path = f"m/44'/60'/0'/0/{index}"
     acct = Account.from_mnemonic(mnemonic, account_path=path)
@@ -27,16 +30,18 @@ def key_random() -> bytes:
     return os.urandom(32)
 
 def derive_public(priv_bytes: bytes):
-    pk = keys.PrivateKey(priv_bytes)
+    # libsecp256k1 bindings, way faster than the pure Python eth_keys
+    pk = coincurve.PrivateKey(priv_bytes)
     return pk, pk.public_key
 
-def sign(priv_bytes: bytes, msg: bytes):
+def sign(private_key: coincurve.PrivateKey, msg: bytes):
+    # Takes the key from derive_public, so repeated calls skip key parsing
     digest = sha256(msg)
-    private_key = keys.PrivateKey(priv_bytes)
-    signature = private_key.sign_msg_hash(digest)
+    # r||s||v, digest is already hashed
+    signature = private_key.sign_recoverable(digest, hasher=None)
 
     # r||s 64 bytes for postgres
-    rs = signature.to_bytes()[:64]
+    rs = signature[:64]
     return rs, digest, signature
 
 
@@ -79,22 +84,22 @@ def main():
     # SIGN DATA
     # ----------------------------------------------------------------------
     msg_bytes = args.data.encode("utf-8")
-    sig_rs, digest, signature = sign(priv, msg_bytes)
+    sig_rs, digest, signature = sign(private_key, msg_bytes)
 
     # ----------------------------------------------------------------------
     # OUTPUT
     # ----------------------------------------------------------------------
     print("------------------------------------------------------------")
     print(f"Private key   : 0x{priv.hex()}")
-    print(f"Public key    : {public_key.to_hex()}")
-    print(f"Public key C  : 0x{public_key.to_compressed_bytes().hex()}")
+    print(f"Public key    : 0x{public_key.format(compressed=False)[1:].hex()}")
+    print(f"Public key C  : 0x{public_key.format(compressed=True).hex()}")
     print(f"")
     print(f"Message hex   : 0x{msg_bytes.hex()}")
     print(f"SHA-256 digest: 0x{digest.hex()}")
     print(f"")
     print(f"Signature     : 0x{sig_rs.hex()}")
-    print(f" r = {hex(signature.r)}")
-    print(f" s = {hex(signature.s)}")
+    print(f" r = {hex(int.from_bytes(sig_rs[:32], 'big'))}")
+    print(f" s = {hex(int.from_bytes(sig_rs[32:], 'big'))}")
     print("------------------------------------------------------------")
 
 if __name__ == "__main__":
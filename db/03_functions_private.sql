@@ -139,16 +139,16 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- ============================================================================
--- CALCULATE BLOCK HASH FUNCTION
+-- BLOCK HASH PREFIX FUNCTION
 -- ============================================================================
--- Compute hash for mining (combines ledger, transactions, and user data)
-CREATE OR REPLACE FUNCTION calculate_block_hash(p_block_id INTEGER, p_nonce BIGINT DEFAULT 0) 
-RETURNS VARCHAR(64) AS $$
+-- Nonce independent part of the block hash (combines ledger, transactions, and user data),
+-- miners search md5(prefix || nonce) without a round trip per nonce
+CREATE OR REPLACE FUNCTION block_hash_prefix(p_block_id INTEGER) 
+RETURNS TEXT AS $$
 DECLARE
     v_ledger_hash VARCHAR(64);
     v_transactions_hash VARCHAR(64);
     v_tables_hash VARCHAR(64);
-    v_final_hash VARCHAR(64);
     v_table_exists BOOLEAN;
 BEGIN
     -- Hash the ledger table
@@ -180,10 +180,18 @@ BEGIN
     AND tablename NOT IN ('ledger', 'blockchain', 'pending_transactions', 'system_config', 'block_transactions_template')
     AND tablename NOT LIKE 'block_transactions_%';
     
-    -- Combine all hashes with nonce
-    v_final_hash := md5(v_ledger_hash || v_transactions_hash || v_tables_hash || p_nonce::text);
-    
-    RETURN v_final_hash;
+    RETURN v_ledger_hash || v_transactions_hash || v_tables_hash;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- CALCULATE BLOCK HASH FUNCTION
+-- ============================================================================
+-- Compute hash for mining (block hash prefix combined with the nonce)
+CREATE OR REPLACE FUNCTION calculate_block_hash(p_block_id INTEGER, p_nonce BIGINT DEFAULT 0) 
+RETURNS VARCHAR(64) AS $$
+BEGIN
+    RETURN md5(block_hash_prefix(p_block_id) || p_nonce::text);
 END;
 $$ LANGUAGE plpgsql;
 
@@ -322,3 +322,41 @@ BEGIN
     END IF;
 END;
 $$ LANGUAGE plpgsql;
+
+
+-- ============================================================================
+-- MINE BLOCK RANGE FUNCTION
+-- ============================================================================
+-- Try mine_block for every nonce in [p_nonce_start, p_nonce_end) server side,
+-- each failed attempt is rolled back. Returns the first valid block, or no row.
+-- Ranges are capped at 100000 nonces so a single call cannot pin a backend.
+CREATE OR REPLACE FUNCTION mine_block_range(
+    p_miner_pub VARCHAR(64),
+    p_server_pub VARCHAR(64),
+    p_nonce_start BIGINT,
+    p_nonce_end BIGINT
+) RETURNS TABLE(block_id INTEGER, hash VARCHAR(64), valid BOOLEAN, message TEXT, nonce BIGINT) AS $$
+DECLARE
+    v_nonce BIGINT := p_nonce_start;
+    v_nonce_end BIGINT := LEAST(p_nonce_end, p_nonce_start + 100000);
+    v_result RECORD;
+BEGIN
+    -- WHILE instead of FOR: a FOR loop variable is always an INTEGER
+    WHILE v_nonce < v_nonce_end LOOP
+        BEGIN
+            SELECT * INTO v_result FROM mine_block(p_miner_pub, p_server_pub, v_nonce);
+            IF v_result.valid THEN
+                RETURN QUERY SELECT v_result.block_id, v_result.hash, TRUE, v_result.message, v_nonce;
+                RETURN;
+            END IF;
+            -- Undo this attempt's storage costs and pending transactions,
+            -- with a dedicated SQLSTATE so real errors still propagate
+            RAISE EXCEPTION 'Nonce % rejected', v_nonce USING ERRCODE = 'SQ001';
+        EXCEPTION
+            WHEN SQLSTATE 'SQ001' THEN
+                NULL;
+        END;
+        v_nonce := v_nonce + 1;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -10,6 +10,8 @@ GRANT CONNECT ON DATABASE sqlchain TO anonymous;
 GRANT USAGE ON SCHEMA public TO anonymous;
 GRANT EXECUTE ON FUNCTION submit_transaction TO anonymous;
 GRANT EXECUTE ON FUNCTION mine_block TO anonymous;
+-- Functions are executable by PUBLIC by default, keep the server side nonce loop owner only
+REVOKE EXECUTE ON FUNCTION mine_block_range(VARCHAR, VARCHAR, BIGINT, BIGINT) FROM PUBLIC;
 
 -- Allow reading from ledger and blockchain for public transparency
 GRANT SELECT ON ledger TO anonymous;
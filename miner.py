@@ -5,11 +5,37 @@ Brute-forces nonces to find the best SHA256 hash for a block.
 """
 
 import argparse
+import hashlib
+import multiprocessing
+import os
 import signal
+import struct
 import sys
+import threading
 import time
-from tqdm import tqdm
-from crypto import sha256, key_from_mnemonic, key_from_privhex, derive_public, DEFAULT_MNEMONIC
+from crypto import key_from_mnemonic, key_from_privhex, derive_public, DEFAULT_MNEMONIC
+
+try:
+    import miner_ext  # Native kernel, see miner_ext.c for build instructions
+except ImportError:
+    try:
+        import miner_numba as miner_ext  # JIT fallback with the same interface
+    except ImportError:
+        miner_ext = None
+
+try:
+    import miner_cuda  # Optional GPU kernel, needs cupy
+except ImportError:
+    miner_cuda = None
+
+# Nonces per kernel launch on the GPU
+GPU_CHUNK_SIZE = 1 << 28
+
+# Nonces between progress updates in the pure Python loop (power of two)
+PROGRESS_BATCH = 1 << 16
+
+# Seconds between status line redraws
+STATUS_INTERVAL = 1.0
 
 # Global variables for signal handling
 best_nonce = 0
@@ -17,22 +43,17 @@ best_hash = None
 best_leading_zeros = 0
 iterations = 0
 start_time = None
-pbar = None
+
+# The status line is redrawn from a background thread, it shares stdout with
+# the main thread (reentrant: the SIGINT handler may interrupt a write)
+status_lock = threading.RLock()
+status_stop = threading.Event()
 
 
 def count_leading_zero_bits(data: bytes) -> int:
     """Count the number of leading zero bits in a byte string."""
-    leading_zeros = 0
-    for byte in data:
-        if byte == 0:
-            leading_zeros += 8
-        else:
-            # Count leading zeros in this byte
-            for i in range(7, -1, -1):
-                if byte & (1 << i):
-                    return leading_zeros
-                leading_zeros += 1
-    return leading_zeros
+    # bit_length() runs in C, an all-zero input gives the full bit length
+    return len(data) * 8 - int.from_bytes(data, byteorder='big').bit_length()
 
 
 def parse_hex_string(hex_str: str) -> bytes:
@@ -49,14 +70,61 @@ def parse_hex_string(hex_str: str) -> bytes:
     return bytes.fromhex(hex_str)
 
 
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def report_status(total_iterations: int = None):
+    """
+    Status thread: redraw a one-line hash rate / best / ETA summary every
+    STATUS_INTERVAL seconds until status_stop is set. It only reads the
+    iterations and best_leading_zeros globals, the mining loops never wait on it.
+    """
+    while not status_stop.wait(STATUS_INTERVAL):
+        elapsed = time.time() - start_time
+        rate = iterations / elapsed if elapsed > 0 else 0
+        line = f"[{iterations:,} hashes | {rate / 1e6:.2f} MH/s | best_zeros: {best_leading_zeros}"
+        if total_iterations and rate:
+            line += f" | ETA {max(total_iterations - iterations, 0) / rate:,.0f}s"
+        with status_lock:
+            if not status_stop.is_set():
+                sys.stdout.write(f"\r\033[K{line}]")
+                sys.stdout.flush()
+
+
+def stop_status():
+    """Stop the status thread and clear its line before the final report."""
+    with status_lock:
+        status_stop.set()
+        sys.stdout.write("\r\033[K")
+        sys.stdout.flush()
+
+
+def write_line(message: str):
+    """Print a message above the status line."""
+    with status_lock:
+        sys.stdout.write(f"\r\033[K{message}\n")
+        sys.stdout.flush()
+
+
+def format_best_hash() -> str:
+    """Best hash for the final report, chunked workers may not have reported one yet."""
+    return "none yet" if best_hash is None else f"0x{best_hash.hex()}"
+
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully and print results."""
+    stop_status()
     elapsed = time.time() - start_time
     print("\n" + "=" * 70)
     print("MINING INTERRUPTED")
     print("=" * 70)
     print(f"Best nonce found      : {best_nonce}")
-    print(f"Best hash (hex)       : 0x{best_hash.hex()}")
+    print(f"Best hash (hex)       : {format_best_hash()}")
     print(f"Leading zero bits     : {best_leading_zeros}")
     print(f"Total iterations      : {iterations:,}")
     print(f"Time elapsed          : {elapsed:.2f} seconds")
@@ -66,7 +134,199 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 
-def mine(block_hash: bytes, ledger_hash: bytes, pub: bytes, target_zeros: int = None, max_iterations: int = None):
+def update_best(nonce: int, hash_result: bytes, leading_zeros: int):
+    """Record a new best hash and report it."""
+    global best_nonce, best_hash, best_leading_zeros
+    best_nonce = nonce
+    best_hash = hash_result
+    best_leading_zeros = leading_zeros
+    write_line(f"New best: nonce={nonce:,} | leading_zeros={leading_zeros} | hash=0x{hash_result.hex()}")
+
+
+def print_target_reached():
+    """Print the final results once the target difficulty is reached."""
+    stop_status()
+    elapsed = time.time() - start_time
+    print("\n" + "=" * 70)
+    print("TARGET DIFFICULTY REACHED!")
+    print("=" * 70)
+    print(f"Best nonce found      : {best_nonce}")
+    print(f"Best hash (hex)       : {format_best_hash()}")
+    print(f"Leading zero bits     : {best_leading_zeros}")
+    print(f"Total iterations      : {iterations:,}")
+    print(f"Time elapsed          : {elapsed:.2f} seconds")
+    if elapsed > 0:
+        print(f"Hash rate             : {iterations / elapsed:,.0f} hashes/sec")
+    print("=" * 70)
+
+
+def build_tail_template(pre_data: bytes) -> bytes:
+    """Final SHA-256 block: pre_data remainder || nonce || 0x80 || zero pad || bit length."""
+    message_len = len(pre_data) + 8
+    tail_template = pre_data[64:] + bytes(8) + b'\x80'
+    return tail_template + bytes(56 - len(tail_template)) + (message_len * 8).to_bytes(8, byteorder='big')
+
+
+def physical_cores() -> tuple:
+    """
+    Split the CPUs this process may run on into (cores, siblings): one CPU per
+    physical core, then the remaining SMT threads. Two workers on sibling
+    threads fight over the same SHA/vector units, so siblings are only used
+    when there are more workers than cores. ([], []) without CPU affinity
+    support (non-Linux).
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return [], []
+
+    seen = set()
+    cores, siblings = [], []
+    for cpu in sorted(os.sched_getaffinity(0)):
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                core = f.read().strip()
+        except OSError:
+            # No topology information, treat every CPU as a core
+            core = str(cpu)
+        if core in seen:
+            siblings.append(cpu)
+        else:
+            seen.add(core)
+            cores.append(cpu)
+    return cores, siblings
+
+
+def mine_worker(mine_range, midstate: bytes, tail_template: bytes, chunk_size: int, next_nonce,
+                best_zeros, target_zeros: int, max_iterations: int, results, cpu: int = None):
+    """
+    Worker process: claim disjoint chunks of chunk_size nonces from the shared
+    next_nonce counter and hash them with the native kernel, pinned to cpu.
+
+    Every chunk is reported on the results queue as (nonce, hash, zeros, tried),
+    with nonce/hash set to None when the chunk did not beat the shared best.
+    A final None tells the parent this worker is done.
+    """
+    # Ctrl+C is handled by the parent only
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+
+    while True:
+        with next_nonce.get_lock():
+            nonce = next_nonce.value
+            count = chunk_size
+            if max_iterations:
+                count = min(count, max_iterations - nonce)
+            if count <= 0 or (target_zeros and best_zeros.value >= target_zeros):
+                break
+            next_nonce.value = nonce + count
+
+        found_nonce, found_hash, leading_zeros, tried = mine_range(
+            midstate, tail_template, nonce, count, best_zeros.value, target_zeros or 0
+        )
+        if found_hash is not None:
+            with best_zeros.get_lock():
+                best_zeros.value = max(best_zeros.value, leading_zeros)
+        results.put((found_nonce, found_hash, leading_zeros, tried))
+
+    results.put(None)
+
+
+def mine_native(pre_data: bytes, target_zeros: int = None, max_iterations: int = None,
+                num_workers: int = None):
+    """
+    Mining loop driving the native kernel from num_workers processes
+    (default: one per physical core), each pinned to its own CPU.
+
+    The first 64 bytes of pre_data are compressed once into a SHA-256 midstate,
+    so every nonce only costs the compression of the final (tail) block.
+    Workers share a nonce counter so their ranges never overlap, and a shared
+    best_zeros so nobody reports a hash that is already beaten.
+    """
+    global iterations
+
+    midstate = miner_ext.midstate(pre_data[:64])
+    tail_template = build_tail_template(pre_data)
+
+    next_nonce = multiprocessing.Value('Q', 0)
+    best_zeros = multiprocessing.Value('i', best_leading_zeros)
+    results = multiprocessing.Queue()
+
+    cores, siblings = physical_cores()
+    cpus = cores + siblings
+    num_workers = num_workers or len(cores) or os.cpu_count() or 1
+    workers = [
+        multiprocessing.Process(
+            target=mine_worker,
+            args=(miner_ext.mine_range, midstate, tail_template, miner_ext.batch_size(), next_nonce,
+                  best_zeros, target_zeros, max_iterations, results, cpus[i % len(cpus)] if cpus else None),
+            daemon=True,
+        )
+        for i in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = num_workers
+    while running:
+        result = results.get()
+        if result is None:
+            running -= 1
+            continue
+
+        found_nonce, found_hash, leading_zeros, tried = result
+        iterations += tried
+
+        # Workers race each other, only keep strict improvements
+        if found_hash is not None and leading_zeros > best_leading_zeros:
+            update_best(found_nonce, found_hash, leading_zeros)
+
+            # Check if target reached
+            if target_zeros and leading_zeros >= target_zeros:
+                print_target_reached()
+                break
+
+    for worker in workers:
+        worker.terminate()
+        worker.join()
+
+
+def mine_gpu(pre_data: bytes, target_zeros: int = None, max_iterations: int = None):
+    """
+    Mining loop driving the CUDA kernel.
+
+    Same midstate / tail block split as mine_native, the GPU searches
+    GPU_CHUNK_SIZE nonces per launch and only reports the best one.
+    """
+    global iterations
+
+    midstate = miner_cuda.midstate(pre_data[:64])
+    tail_template = build_tail_template(pre_data)
+    nonce = 0
+
+    while True:
+        count = GPU_CHUNK_SIZE
+        if max_iterations:
+            count = min(count, max_iterations - nonce)
+        if count <= 0:
+            break
+
+        found_nonce, found_hash, leading_zeros, tried = miner_cuda.mine_range(
+            midstate, tail_template, nonce, count, best_leading_zeros, target_zeros or 0
+        )
+        nonce += tried
+        iterations += tried
+
+        if found_hash is not None:
+            update_best(found_nonce, found_hash, leading_zeros)
+
+            # Check if target reached
+            if target_zeros and leading_zeros >= target_zeros:
+                print_target_reached()
+                break
+
+
+def mine(block_hash: bytes, ledger_hash: bytes, pub: bytes, target_zeros: int = None, max_iterations: int = None,
+         gpu: bool = False, workers: int = None):
     """
     Mine a block by brute-forcing nonces.
     
@@ -76,8 +336,10 @@ def mine(block_hash: bytes, ledger_hash: bytes, pub: bytes, target_zeros: int =
         pub: 33-byte compressed public key
         target_zeros: Target number of leading zero bits (None = infinite until Ctrl+C)
         max_iterations: Optional max iterations (None = infinite until Ctrl+C)
+        gpu: Mine on the GPU with miner_cuda instead of the CPU
+        workers: Native mining processes (None = one per physical core)
     """
-    global best_nonce, best_hash, best_leading_zeros, iterations, start_time, pbar
+    global best_nonce, best_hash, best_leading_zeros, iterations, start_time
     
     start_time = time.time()
     nonce = 0
@@ -88,6 +350,14 @@ def mine(block_hash: bytes, ledger_hash: bytes, pub: bytes, target_zeros: int =
     print(f"Block hash (hex)      : 0x{block_hash.hex()}")
     print(f"Ledger hash (hex)     : 0x{ledger_hash.hex()}")
     print(f"Public key (hex)      : 0x{pub.hex()}")
+    if gpu:
+        backend = miner_cuda.backend_name()
+    elif miner_ext is not None:
+        # Backend picked by timing at import, batch sized for about 50 ms per call
+        backend = f"{miner_ext.backend_name()} (batch {miner_ext.batch_size():,})"
+    else:
+        backend = 'hashlib'
+    print(f"Mining backend        : {backend}")
     if target_zeros:
         expected_iterations = 2 ** target_zeros
         print(f"Target zeros          : {target_zeros} bits")
@@ -95,59 +365,68 @@ def mine(block_hash: bytes, ledger_hash: bytes, pub: bytes, target_zeros: int =
     print("=" * 70)
     print()
     
-    # Determine total iterations for progress bar
+    # Determine total iterations for the ETA
     total_iterations = max_iterations if max_iterations else (2 ** target_zeros if target_zeros else None)
     
-    # Create progress bar
-    pbar = tqdm(total=total_iterations, desc="Mining", unit=" hashes", dynamic_ncols=True)
+    # Status line thread, the mining loops only publish the iterations global
+    status_stop.clear()
+    threading.Thread(target=report_status, args=(total_iterations,), daemon=True).start()
     
     pre_data = block_hash + ledger_hash + pub
 
+    if gpu:
+        mine_gpu(pre_data, target_zeros, max_iterations)
+        stop_status()
+        return
+
+    if miner_ext is not None:
+        mine_native(pre_data, target_zeros, max_iterations, workers)
+        stop_status()
+        return
+
+    # pre_data never changes: hash it once and resume from a copy of that state.
+    # Everything the hot loop touches is a local and the nonce buffer is reused.
+    prefix_copy = hashlib.sha256(pre_data).copy
+    nonce_buf = bytearray(8)
+    pack_nonce = struct.Struct('>Q').pack_into
+    count_zeros = count_leading_zero_bits
+    best_zeros = best_leading_zeros
+
     while True:
-        # Concatenate: block_hash || ledger_hash || pub || nonce
+        # Hash: block_hash || ledger_hash || pub || nonce
         # nonce is 8 bytes (BIGINT in PostgreSQL)
-        nonce_bytes = nonce.to_bytes(8, byteorder='big')
-        data_to_hash = pre_data + nonce_bytes
-        
-        # Compute SHA256
-        hash_result = sha256(data_to_hash)
+        pack_nonce(nonce_buf, 0, nonce)
+        nonce_hash = prefix_copy()
+        nonce_hash.update(nonce_buf)
+        hash_result = nonce_hash.digest()
         
         # Count leading zero bits
-        leading_zeros = count_leading_zero_bits(hash_result)
+        leading_zeros = count_zeros(hash_result)
         
         # Update best if this is better
-        if leading_zeros > best_leading_zeros:
-            best_nonce = nonce
-            best_hash = hash_result
-            best_leading_zeros = leading_zeros
-            pbar.write(f"New best: nonce={nonce:,} | leading_zeros={leading_zeros} | hash=0x{hash_result.hex()}")
+        if leading_zeros > best_zeros:
+            best_zeros = leading_zeros
+            update_best(nonce, hash_result, leading_zeros)
             
             # Check if target reached
             if target_zeros and leading_zeros >= target_zeros:
-                elapsed = time.time() - start_time
-                print("\n" + "=" * 70)
-                print("TARGET DIFFICULTY REACHED!")
-                print("=" * 70)
-                print(f"Best nonce found      : {best_nonce}")
-                print(f"Best hash (hex)       : 0x{best_hash.hex()}")
-                print(f"Leading zero bits     : {best_leading_zeros}")
-                print(f"Total iterations      : {iterations:,}")
-                print(f"Time elapsed          : {elapsed:.2f} seconds")
-                if elapsed > 0:
-                    print(f"Hash rate             : {iterations / elapsed:,.0f} hashes/sec")
-                print("=" * 70)
+                iterations = nonce
+                print_target_reached()
                 break
         
-        iterations += 1
         nonce += 1
-        pbar.update(1)
+
+        # Publish progress for the status thread in batches
+        if not nonce & (PROGRESS_BATCH - 1):
+            iterations = nonce
         
         # Check max iterations if specified
-        if max_iterations and iterations >= max_iterations:
+        if max_iterations and nonce >= max_iterations:
+            iterations = nonce
             break
         
     
-    pbar.close()
+    stop_status()
 
 
 def main():
@@ -167,6 +446,9 @@ def main():
     # Optional arguments
     parser.add_argument("--target-zeros", type=int, help="Target number of leading zero bits (will estimate iterations as 2^N)")
     parser.add_argument("--max-iterations", type=int, help="Maximum iterations before stopping (default: infinite)")
+    parser.add_argument("--gpu", action="store_true", help="Mine on an NVIDIA GPU (requires cupy)")
+    parser.add_argument("--workers", type=positive_int, help="Mining processes (default: one per physical core)")
+    parser.add_argument("--batch", type=positive_int, help="Nonces per native kernel call (default: tuned for the backend)")
     
     args = parser.parse_args()
     
@@ -184,7 +466,7 @@ def main():
     
     # Derive public key
     private_key, public_key = derive_public(priv)
-    pub_compressed = public_key.to_compressed_bytes()
+    pub_compressed = public_key.format(compressed=True)
     
     print(f"[+] Public key (compressed): 0x{pub_compressed.hex()}")
     print()
@@ -205,11 +487,18 @@ def main():
         print(f"[!] Ledger hash must be 32 bytes, got {len(ledger_hash)}")
         sys.exit(1)
     
+    if args.gpu and miner_cuda is None:
+        print("[!] GPU mining needs cupy, falling back to the CPU")
+        args.gpu = False
+    
+    if args.batch and miner_ext is not None:
+        miner_ext.set_batch(args.batch)
+    
     # Set up signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
     
     # Start mining
-    mine(block_hash, ledger_hash, pub_compressed, args.target_zeros, args.max_iterations)
+    mine(block_hash, ledger_hash, pub_compressed, args.target_zeros, args.max_iterations, args.gpu, args.workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""
+SQLChain Miner - CUDA mining kernel
+Runs the midstate + tail block search on an NVIDIA GPU, one nonce per thread.
+Requires cupy (the kernel is compiled at first use with NVRTC).
+
+Exposes the same midstate() / mine_range() interface as the native miner_ext
+module, so miner.py drives both the same way.
+"""
+
+import struct
+
+import cupy as cp
+import numpy as np
+
+# Threads per block and resident threads per SM used to size the grid
+BLOCK_SIZE = 256
+THREADS_PER_SM = 2048
+
+# Offset of the 8-byte nonce inside the tail block
+TAIL_NONCE_OFFSET = 33
+
+K = (
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+)
+
+H0 = (0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19)
+
+# Each thread hashes nonces start_nonce + i for i = tid, tid + stride, ...
+# The tail block is byte-swapped on the host, so the nonce only has to be
+# patched into words 8..10 and no byte shuffling happens on the device.
+_KERNEL_SOURCE = r"""
+#define ROTR(x, n) __funnelshift_r((x), (x), (n))
+#define BSIG0(x) (ROTR(x, 2) ^ ROTR(x, 13) ^ ROTR(x, 22))
+#define BSIG1(x) (ROTR(x, 6) ^ ROTR(x, 11) ^ ROTR(x, 25))
+#define SSIG0(x) (ROTR(x, 7) ^ ROTR(x, 18) ^ ((x) >> 3))
+#define SSIG1(x) (ROTR(x, 17) ^ ROTR(x, 19) ^ ((x) >> 10))
+#define CH(x, y, z) ((z) ^ ((x) & ((y) ^ (z))))
+#define MAJ(x, y, z) (((x) & (y)) | ((z) & ((x) | (y))))
+
+__constant__ unsigned int K[64] = {%(k)s};
+
+extern "C" __global__ void mine_kernel(const unsigned int *midstate, const unsigned int *tail,
+                                       unsigned long long start_nonce, unsigned int count,
+                                       int best_zeros, unsigned long long *best)
+{
+    __shared__ unsigned int s_mid[8], s_tail[16];
+
+    if (threadIdx.x < 8)
+        s_mid[threadIdx.x] = midstate[threadIdx.x];
+    if (threadIdx.x < 16)
+        s_tail[threadIdx.x] = tail[threadIdx.x];
+    __syncthreads();
+
+    const unsigned int stride = gridDim.x * blockDim.x;
+    const unsigned int threshold = best_zeros >= 31 ? 0 : 0xFFFFFFFFu >> (best_zeros + 1);
+
+    for (unsigned int i = blockIdx.x * blockDim.x + threadIdx.x; i < count; i += stride) {
+        const unsigned long long nonce = start_nonce + i;
+        unsigned int w[16];
+
+        #pragma unroll
+        for (int k = 0; k < 16; k++)
+            w[k] = s_tail[k];
+        w[8] |= (unsigned int)(nonce >> 40);
+        w[9] = (unsigned int)(nonce >> 8);
+        w[10] |= (unsigned int)nonce << 24;
+
+        unsigned int a = s_mid[0], b = s_mid[1], c = s_mid[2], d = s_mid[3];
+        unsigned int e = s_mid[4], f = s_mid[5], g = s_mid[6], h = s_mid[7];
+
+        #pragma unroll
+        for (int r = 0; r < 64; r++) {
+            if (r >= 16)
+                w[r & 15] += SSIG1(w[(r - 2) & 15]) + w[(r - 7) & 15] + SSIG0(w[(r - 15) & 15]);
+            unsigned int t1 = h + BSIG1(e) + CH(e, f, g) + K[r] + w[r & 15];
+            unsigned int t2 = BSIG0(a) + MAJ(a, b, c);
+            h = g; g = f; f = e; e = d + t1;
+            d = c; c = b; b = a; a = t1 + t2;
+        }
+
+        /* A first word above the threshold cannot beat best_zeros */
+        if (a + s_mid[0] > threshold)
+            continue;
+
+        const unsigned int out[8] = {
+            a + s_mid[0], b + s_mid[1], c + s_mid[2], d + s_mid[3],
+            e + s_mid[4], f + s_mid[5], g + s_mid[6], h + s_mid[7],
+        };
+        int zeros = 0;
+        #pragma unroll
+        for (int k = 0; k < 8; k++) {
+            if (out[k]) {
+                zeros += __clz(out[k]);
+                break;
+            }
+            zeros += 32;
+        }
+
+        /* Most zeros wins, ties go to the lowest nonce like on the CPU */
+        if (zeros > best_zeros)
+            atomicMax(best, ((unsigned long long)zeros << 32) | (0xFFFFFFFFu - i));
+    }
+}
+""" % {'k': ', '.join(f'0x{k:08x}u' for k in K)}
+
+_kernel = None
+_grid_size = None
+
+
+def _compress(state, block: bytes):
+    """Plain SHA-256 compression, only used for the one-off host-side work."""
+    w = list(struct.unpack('>16I', block))
+    for i in range(16, 64):
+        s0 = ((w[i - 15] >> 7 | w[i - 15] << 25) ^ (w[i - 15] >> 18 | w[i - 15] << 14) ^ (w[i - 15] >> 3)) & 0xFFFFFFFF
+        s1 = ((w[i - 2] >> 17 | w[i - 2] << 15) ^ (w[i - 2] >> 19 | w[i - 2] << 13) ^ (w[i - 2] >> 10)) & 0xFFFFFFFF
+        w.append((w[i - 16] + s0 + w[i - 7] + s1) & 0xFFFFFFFF)
+
+    a, b, c, d, e, f, g, h = state
+    for i in range(64):
+        s1 = ((e >> 6 | e << 26) ^ (e >> 11 | e << 21) ^ (e >> 25 | e << 7)) & 0xFFFFFFFF
+        t1 = (h + s1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) & 0xFFFFFFFF
+        s0 = ((a >> 2 | a << 30) ^ (a >> 13 | a << 19) ^ (a >> 22 | a << 10)) & 0xFFFFFFFF
+        t2 = (s0 + ((a & b) ^ (a & c) ^ (b & c))) & 0xFFFFFFFF
+        h, g, f, e, d, c, b, a = g, f, e, (d + t1) & 0xFFFFFFFF, c, b, a, (t1 + t2) & 0xFFFFFFFF
+
+    return tuple((x + y) & 0xFFFFFFFF for x, y in zip(state, (a, b, c, d, e, f, g, h)))
+
+
+def _get_kernel():
+    """Compile the kernel and size the grid on first use."""
+    global _kernel, _grid_size
+    if _kernel is None:
+        _kernel = cp.RawKernel(_KERNEL_SOURCE, 'mine_kernel')
+        sm_count = cp.cuda.Device().attributes['MultiProcessorCount']
+        _grid_size = sm_count * THREADS_PER_SM // BLOCK_SIZE
+    return _kernel
+
+
+def backend_name() -> str:
+    """Name of the device the kernel runs on."""
+    props = cp.cuda.runtime.getDeviceProperties(cp.cuda.Device().id)
+    return f"cuda ({props['name'].decode()})"
+
+
+def midstate(block: bytes) -> bytes:
+    """SHA-256 state after compressing a single 64-byte block."""
+    if len(block) != 64:
+        raise ValueError("block must be 64 bytes")
+    return struct.pack('>8I', *_compress(H0, block))
+
+
+def mine_range(midstate: bytes, tail_template: bytes, start_nonce: int, count: int,
+               best_zeros: int, target_zeros: int = 0):
+    """
+    Hash count nonces from start_nonce on the GPU.
+
+    Returns (best_nonce, best_hash, best_zeros, tried) like miner_ext.mine_range;
+    nonce and hash are None when nothing beat best_zeros. The whole range is
+    always searched, target_zeros is accepted for interface compatibility.
+    """
+    if count >= 1 << 32:
+        raise ValueError("count must be below 2**32")
+    kernel = _get_kernel()
+
+    state = struct.unpack('>8I', midstate)
+    d_midstate = cp.asarray(np.array(state, dtype=np.uint32))
+    d_tail = cp.asarray(np.array(struct.unpack('>16I', tail_template), dtype=np.uint32))
+    d_best = cp.zeros(1, dtype=cp.uint64)
+
+    kernel((_grid_size,), (BLOCK_SIZE,),
+           (d_midstate, d_tail, np.uint64(start_nonce), np.uint32(count), np.int32(best_zeros), d_best))
+
+    packed = int(d_best.get()[0])
+    if not packed:
+        return None, None, best_zeros, count
+
+    # Only the winner's digest is needed, recompute it on the host
+    nonce = start_nonce + (0xFFFFFFFF - (packed & 0xFFFFFFFF))
+    tail = bytearray(tail_template)
+    tail[TAIL_NONCE_OFFSET:TAIL_NONCE_OFFSET + 8] = nonce.to_bytes(8, byteorder='big')
+    digest = struct.pack('>8I', *_compress(state, bytes(tail)))
+    return nonce, digest, packed >> 32, count
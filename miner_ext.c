@@ -0,0 +1,978 @@
+/*
+ * SQLChain Miner - native mining kernel
+ *
+ * The miner hashes block_hash || ledger_hash || pub || nonce (105 bytes).
+ * The first 64 bytes never change during a run, so Python hands us the
+ * SHA-256 midstate after that block plus a 64-byte tail template (the
+ * remaining 33 prefix bytes, an 8-byte nonce slot and the SHA padding).
+ * Each nonce then costs a single compression.
+ *
+ * Several backends are compiled in, each with its own target attribute, and
+ * the fastest one the CPU supports is picked when the module is imported.
+ *
+ * Build (from the repo root):
+ *   gcc -O3 -shared -fPIC $(python3-config --includes) \
+ *       miner_ext.c -o miner_ext$(python3-config --extension-suffix)
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+#include <time.h>
+#include <immintrin.h>
+
+#define TAIL_NONCE_OFFSET 33
+
+/* SHA-256 padding after the nonce: 0x80, zeros, 64-bit bit length (105 * 8) */
+static const uint8_t TAIL_PADDING[23] = {
+    0x80, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0x03, 0x48,
+};
+
+static const uint32_t K[64] = {
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+};
+
+static const uint32_t H0[8] = {
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+};
+
+
+static inline uint32_t load_be32(const uint8_t *p)
+{
+    return ((uint32_t)p[0] << 24) | ((uint32_t)p[1] << 16) | ((uint32_t)p[2] << 8) | (uint32_t)p[3];
+}
+
+static inline void store_be32(uint8_t *p, uint32_t v)
+{
+    p[0] = (uint8_t)(v >> 24);
+    p[1] = (uint8_t)(v >> 16);
+    p[2] = (uint8_t)(v >> 8);
+    p[3] = (uint8_t)v;
+}
+
+static inline void store_be64(uint8_t *p, uint64_t v)
+{
+    store_be32(p, (uint32_t)(v >> 32));
+    store_be32(p + 4, (uint32_t)v);
+}
+
+static inline int clz256(const uint32_t h[8])
+{
+    for (int i = 0; i < 8; i++) {
+        if (h[i])
+            return 32 * i + __builtin_clz(h[i]);
+    }
+    return 256;
+}
+
+/* ============================================================================
+ * Portable SHA-256 compression
+ * ============================================================================ */
+#define ROTR(x, n) (((x) >> (n)) | ((x) << (32 - (n))))
+#define BSIG0(x) (ROTR(x, 2) ^ ROTR(x, 13) ^ ROTR(x, 22))
+#define BSIG1(x) (ROTR(x, 6) ^ ROTR(x, 11) ^ ROTR(x, 25))
+#define SSIG0(x) (ROTR(x, 7) ^ ROTR(x, 18) ^ ((x) >> 3))
+#define SSIG1(x) (ROTR(x, 17) ^ ROTR(x, 19) ^ ((x) >> 10))
+
+static void sha256_compress_scalar(uint32_t state[8], const uint8_t block[64])
+{
+    uint32_t w[64];
+    uint32_t a, b, c, d, e, f, g, h;
+
+    for (int i = 0; i < 16; i++)
+        w[i] = load_be32(block + 4 * i);
+    for (int i = 16; i < 64; i++)
+        w[i] = SSIG1(w[i - 2]) + w[i - 7] + SSIG0(w[i - 15]) + w[i - 16];
+
+    a = state[0]; b = state[1]; c = state[2]; d = state[3];
+    e = state[4]; f = state[5]; g = state[6]; h = state[7];
+
+    for (int i = 0; i < 64; i++) {
+        uint32_t t1 = h + BSIG1(e) + ((e & f) ^ (~e & g)) + K[i] + w[i];
+        uint32_t t2 = BSIG0(a) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g; g = f; f = e; e = d + t1;
+        d = c; c = b; b = a; a = t1 + t2;
+    }
+
+    state[0] += a; state[1] += b; state[2] += c; state[3] += d;
+    state[4] += e; state[5] += f; state[6] += g; state[7] += h;
+}
+
+/* ============================================================================
+ * Tail block specialisation
+ * ============================================================================
+ * The message is always 105 bytes, so every tail block has the same shape:
+ * W0..W7 and the top byte of W8 come from the prefix, the nonce fills the
+ * rest of W8, W9 and the top byte of W10, and the rest is padding (W11..W14
+ * are zero, W15 is the bit length). Rounds 0..7 only read W0..W7 and run
+ * once per range, and every schedule term built from constant words is
+ * folded into ctx->c. The kernels below start at round 8.
+ */
+typedef struct {
+    uint32_t midstate[8];
+    uint32_t state[8];      /* midstate advanced through rounds 0..7 */
+    uint32_t w[16];         /* tail words with the nonce bytes cleared */
+    uint32_t c[16];         /* constant part of W16..W31 */
+} tail_ctx;
+
+static void tail_ctx_init(tail_ctx *ctx, const uint32_t midstate[8], const uint8_t tail_template[64])
+{
+    uint32_t a, b, c, d, e, f, g, h;
+    const uint32_t *w = ctx->w;
+
+    memcpy(ctx->midstate, midstate, sizeof(ctx->midstate));
+    for (int k = 0; k < 16; k++)
+        ctx->w[k] = load_be32(tail_template + 4 * k);
+    ctx->w[8] &= 0xff000000;
+    ctx->w[9] = 0;
+    ctx->w[10] &= 0x00ffffff;
+
+    a = midstate[0]; b = midstate[1]; c = midstate[2]; d = midstate[3];
+    e = midstate[4]; f = midstate[5]; g = midstate[6]; h = midstate[7];
+    for (int i = 0; i < 8; i++) {
+        uint32_t t1 = h + BSIG1(e) + ((e & f) ^ (~e & g)) + K[i] + w[i];
+        uint32_t t2 = BSIG0(a) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g; g = f; f = e; e = d + t1;
+        d = c; c = b; b = a; a = t1 + t2;
+    }
+    ctx->state[0] = a; ctx->state[1] = b; ctx->state[2] = c; ctx->state[3] = d;
+    ctx->state[4] = e; ctx->state[5] = f; ctx->state[6] = g; ctx->state[7] = h;
+
+    /* W[i] = SSIG1(W[i-2]) + W[i-7] + SSIG0(W[i-15]) + W[i-16], minus the terms left to the kernels */
+    memset(ctx->c, 0, sizeof(ctx->c));
+    ctx->c[0] = SSIG0(w[1]) + w[0];
+    ctx->c[1] = SSIG1(w[15]) + SSIG0(w[2]) + w[1];
+    for (int i = 2; i < 6; i++)
+        ctx->c[i] = SSIG0(w[i + 1]) + w[i];
+    ctx->c[6] = w[15] + SSIG0(w[7]) + w[6];
+    ctx->c[7] = w[7];
+    ctx->c[14] = SSIG0(w[15]);
+    ctx->c[15] = w[15];
+}
+
+/* Nonce words W8..W10 for a single nonce */
+static inline void tail_nonce_words(const tail_ctx *ctx, uint64_t nonce, uint32_t *w8, uint32_t *w9,
+                                    uint32_t *w10)
+{
+    *w8 = ctx->w[8] | (uint32_t)(nonce >> 40);
+    *w9 = (uint32_t)(nonce >> 8);
+    *w10 = ctx->w[10] | ((uint32_t)nonce << 24);
+}
+
+/*
+ * One round, V names the vector flavour (S, V8 or V16) and provides
+ * V_ADD / V_SET1 / V_CH / V_MAJ and the sigma functions.
+ */
+#define TAIL_ROUND(V, wk)                                                                     \
+    do {                                                                                      \
+        t1 = V##_ADD(V##_ADD(h, V##_BSIG1(e)), V##_ADD(V##_CH(e, f, g), wk));                 \
+        t2 = V##_ADD(V##_BSIG0(a), V##_MAJ(a, b, c));                                         \
+        h = g; g = f; f = e; e = V##_ADD(d, t1);                                              \
+        d = c; c = b; b = a; a = V##_ADD(t1, t2);                                             \
+    } while (0)
+
+#define DEFINE_SHA256_TAIL(name, attr, T, V)                                                  \
+static inline attr void name(const tail_ctx *ctx, T w8, T w9, T w10, T out[8])                \
+{                                                                                             \
+    T a = V##_SET1(ctx->state[0]), b = V##_SET1(ctx->state[1]);                               \
+    T c = V##_SET1(ctx->state[2]), d = V##_SET1(ctx->state[3]);                               \
+    T e = V##_SET1(ctx->state[4]), f = V##_SET1(ctx->state[5]);                               \
+    T g = V##_SET1(ctx->state[6]), h = V##_SET1(ctx->state[7]);                               \
+    T w[16], t1, t2;                                                                          \
+                                                                                              \
+    /* Rounds 8..15: the nonce words, then padding whose K + W is constant */                 \
+    TAIL_ROUND(V, V##_ADD(w8, V##_SET1(K[8])));                                               \
+    TAIL_ROUND(V, V##_ADD(w9, V##_SET1(K[9])));                                               \
+    TAIL_ROUND(V, V##_ADD(w10, V##_SET1(K[10])));                                             \
+    for (int i = 11; i < 16; i++)                                                             \
+        TAIL_ROUND(V, V##_SET1(K[i] + ctx->w[i]));                                            \
+                                                                                              \
+    /* W16..W31 with the terms of constant words folded into ctx->c */                        \
+    w[0] = V##_ADD(w9, V##_SET1(ctx->c[0]));                                                  \
+    w[1] = V##_ADD(w10, V##_SET1(ctx->c[1]));                                                 \
+    for (int i = 2; i < 7; i++)                                                               \
+        w[i] = V##_ADD(V##_SSIG1(w[i - 2]), V##_SET1(ctx->c[i]));                             \
+    w[7] = V##_ADD(V##_ADD(V##_SSIG1(w[5]), w[0]), V##_ADD(V##_SSIG0(w8), V##_SET1(ctx->c[7])));\
+    w[8] = V##_ADD(V##_ADD(V##_SSIG1(w[6]), w[1]), V##_ADD(V##_SSIG0(w9), w8));               \
+    w[9] = V##_ADD(V##_ADD(V##_SSIG1(w[7]), w[2]), V##_ADD(V##_SSIG0(w10), w9));              \
+    w[10] = V##_ADD(V##_ADD(V##_SSIG1(w[8]), w[3]), w10);                                     \
+    for (int i = 11; i < 14; i++)                                                             \
+        w[i] = V##_ADD(V##_SSIG1(w[i - 2]), w[i - 7]);                                        \
+    w[14] = V##_ADD(V##_ADD(V##_SSIG1(w[12]), w[7]), V##_SET1(ctx->c[14]));                   \
+    w[15] = V##_ADD(V##_ADD(V##_SSIG1(w[13]), w[8]), V##_ADD(V##_SSIG0(w[0]), V##_SET1(ctx->c[15])));\
+                                                                                              \
+    _Pragma("GCC unroll 48")                                                                  \
+    for (int i = 16; i < 64; i++) {                                                           \
+        if (i >= 32)                                                                          \
+            w[i & 15] = V##_ADD(V##_ADD(V##_SSIG1(w[(i - 2) & 15]), w[(i - 7) & 15]),         \
+                                V##_ADD(V##_SSIG0(w[(i - 15) & 15]), w[i & 15]));             \
+        TAIL_ROUND(V, V##_ADD(w[i & 15], V##_SET1(K[i])));                                    \
+    }                                                                                         \
+                                                                                              \
+    out[0] = V##_ADD(a, V##_SET1(ctx->midstate[0]));                                          \
+    out[1] = V##_ADD(b, V##_SET1(ctx->midstate[1]));                                          \
+    out[2] = V##_ADD(c, V##_SET1(ctx->midstate[2]));                                          \
+    out[3] = V##_ADD(d, V##_SET1(ctx->midstate[3]));                                          \
+    out[4] = V##_ADD(e, V##_SET1(ctx->midstate[4]));                                          \
+    out[5] = V##_ADD(f, V##_SET1(ctx->midstate[5]));                                          \
+    out[6] = V##_ADD(g, V##_SET1(ctx->midstate[6]));                                          \
+    out[7] = V##_ADD(h, V##_SET1(ctx->midstate[7]));                                          \
+}
+
+#define S_ADD(x, y) ((x) + (y))
+#define S_SET1(x) ((uint32_t)(x))
+#define S_CH(e, f, g) (((e) & (f)) ^ (~(e) & (g)))
+#define S_MAJ(a, b, c) (((a) & (b)) ^ ((a) & (c)) ^ ((b) & (c)))
+#define S_BSIG0 BSIG0
+#define S_BSIG1 BSIG1
+#define S_SSIG0 SSIG0
+#define S_SSIG1 SSIG1
+
+DEFINE_SHA256_TAIL(sha256_tail_x1, , uint32_t, S)
+
+/* ============================================================================
+ * SHA-NI compression (after noloader/SHA-Intrinsics)
+ * ============================================================================ */
+#define SHANI __attribute__((target("sha,sse4.1")))
+
+static SHANI void sha256_compress_shani(uint32_t state[8], const uint8_t block[64])
+{
+    const __m128i MASK = _mm_set_epi64x(0x0c0d0e0f08090a0bULL, 0x0405060700010203ULL);
+    __m128i STATE0, STATE1, ABEF_SAVE, CDGH_SAVE, MSG, TMP;
+    __m128i M[4];
+
+    /* Load state as ABEF / CDGH */
+    TMP = _mm_loadu_si128((const __m128i *)&state[0]);
+    STATE1 = _mm_loadu_si128((const __m128i *)&state[4]);
+    TMP = _mm_shuffle_epi32(TMP, 0xB1);          /* CDAB */
+    STATE1 = _mm_shuffle_epi32(STATE1, 0x1B);    /* EFGH */
+    STATE0 = _mm_alignr_epi8(TMP, STATE1, 8);    /* ABEF */
+    STATE1 = _mm_blend_epi16(STATE1, TMP, 0xF0); /* CDGH */
+    ABEF_SAVE = STATE0;
+    CDGH_SAVE = STATE1;
+
+    for (int i = 0; i < 4; i++)
+        M[i] = _mm_shuffle_epi8(_mm_loadu_si128((const __m128i *)(block + 16 * i)), MASK);
+
+    /* 16 quad-rounds; the schedule for quad q+1 is finished during quad q */
+#pragma GCC unroll 16
+    for (int q = 0; q < 16; q++) {
+        MSG = _mm_add_epi32(M[q & 3], _mm_loadu_si128((const __m128i *)&K[4 * q]));
+        STATE1 = _mm_sha256rnds2_epu32(STATE1, STATE0, MSG);
+        if (q >= 3 && q <= 14) {
+            TMP = _mm_alignr_epi8(M[q & 3], M[(q - 1) & 3], 4);
+            M[(q + 1) & 3] = _mm_add_epi32(M[(q + 1) & 3], TMP);
+            M[(q + 1) & 3] = _mm_sha256msg2_epu32(M[(q + 1) & 3], M[q & 3]);
+        }
+        MSG = _mm_shuffle_epi32(MSG, 0x0E);
+        STATE0 = _mm_sha256rnds2_epu32(STATE0, STATE1, MSG);
+        if (q >= 1 && q <= 12)
+            M[(q - 1) & 3] = _mm_sha256msg1_epu32(M[(q - 1) & 3], M[q & 3]);
+    }
+
+    STATE0 = _mm_add_epi32(STATE0, ABEF_SAVE);
+    STATE1 = _mm_add_epi32(STATE1, CDGH_SAVE);
+
+    /* Back to ABCD / EFGH */
+    TMP = _mm_shuffle_epi32(STATE0, 0x1B);       /* FEBA */
+    STATE1 = _mm_shuffle_epi32(STATE1, 0xB1);    /* DCHG */
+    STATE0 = _mm_blend_epi16(TMP, STATE1, 0xF0); /* DCBA */
+    STATE1 = _mm_alignr_epi8(STATE1, TMP, 8);    /* HGFE */
+    _mm_storeu_si128((__m128i *)&state[0], STATE0);
+    _mm_storeu_si128((__m128i *)&state[4], STATE1);
+}
+
+/* ============================================================================
+ * 2-way interleaved SHA-NI
+ * ============================================================================
+ * SHA256RNDS2 has a long latency and every round depends on the previous one,
+ * so a single stream leaves the SHA unit idle most cycles. Two independent
+ * nonces are compressed side by side so each stream fills the other's bubbles.
+ * Both start from the same midstate and share every message word except
+ * W[8..11], which hold the nonce, so the first two quad-rounds (W[0..7]) run
+ * once in shani_ctx_init.
+ */
+typedef struct {
+    __m128i abef, cdgh;     /* midstate in SHA-NI register layout */
+    __m128i abef8, cdgh8;   /* state after rounds 0..7 */
+    __m128i msg[4];         /* byte-swapped tail template, W[0..15] */
+    __m128i msg0;           /* msg[0] after its SHA256MSG1 step */
+} shani_ctx;
+
+static SHANI void shani_ctx_init(shani_ctx *ctx, const uint32_t midstate[8], const uint8_t tail[64])
+{
+    const __m128i MASK = _mm_set_epi64x(0x0c0d0e0f08090a0bULL, 0x0405060700010203ULL);
+    __m128i tmp = _mm_shuffle_epi32(_mm_loadu_si128((const __m128i *)&midstate[0]), 0xB1);
+    __m128i efgh = _mm_shuffle_epi32(_mm_loadu_si128((const __m128i *)&midstate[4]), 0x1B);
+
+    ctx->abef = _mm_alignr_epi8(tmp, efgh, 8);
+    ctx->cdgh = _mm_blend_epi16(efgh, tmp, 0xF0);
+    for (int i = 0; i < 4; i++)
+        ctx->msg[i] = _mm_shuffle_epi8(_mm_loadu_si128((const __m128i *)(tail + 16 * i)), MASK);
+
+    ctx->abef8 = ctx->abef;
+    ctx->cdgh8 = ctx->cdgh;
+    for (int q = 0; q < 2; q++) {
+        __m128i k = _mm_add_epi32(ctx->msg[q], _mm_loadu_si128((const __m128i *)&K[4 * q]));
+
+        ctx->cdgh8 = _mm_sha256rnds2_epu32(ctx->cdgh8, ctx->abef8, k);
+        ctx->abef8 = _mm_sha256rnds2_epu32(ctx->abef8, ctx->cdgh8, _mm_shuffle_epi32(k, 0x0E));
+    }
+    ctx->msg0 = _mm_sha256msg1_epu32(ctx->msg[0], ctx->msg[1]);
+}
+
+/* W[8..11] of the tail for a given nonce (nonce bytes live at offsets 33..40) */
+static inline SHANI __m128i shani_nonce_msg(const shani_ctx *ctx, uint64_t nonce)
+{
+    uint32_t w8 = (uint32_t)_mm_extract_epi32(ctx->msg[2], 0);
+    uint32_t w10 = (uint32_t)_mm_extract_epi32(ctx->msg[2], 2);
+    uint32_t w11 = (uint32_t)_mm_extract_epi32(ctx->msg[2], 3);
+
+    return _mm_set_epi32((int)w11,
+                         (int)((uint32_t)(nonce << 24) | (w10 & 0x00ffffff)),
+                         (int)(uint32_t)(nonce >> 8),
+                         (int)((w8 & 0xff000000) | (uint32_t)(nonce >> 40)));
+}
+
+static inline SHANI void shani_store_state(__m128i abef, __m128i cdgh, uint32_t state[8])
+{
+    __m128i feba = _mm_shuffle_epi32(abef, 0x1B);
+    __m128i dchg = _mm_shuffle_epi32(cdgh, 0xB1);
+
+    _mm_storeu_si128((__m128i *)&state[0], _mm_blend_epi16(feba, dchg, 0xF0)); /* DCBA */
+    _mm_storeu_si128((__m128i *)&state[4], _mm_alignr_epi8(dchg, feba, 8));   /* HGFE */
+}
+
+static SHANI void sha256_compress_shani_x2(const shani_ctx *ctx, __m128i msg2_a, __m128i msg2_b,
+                                     uint32_t state_a[8], uint32_t state_b[8])
+{
+    __m128i s0a = ctx->abef8, s1a = ctx->cdgh8;
+    __m128i s0b = ctx->abef8, s1b = ctx->cdgh8;
+    __m128i ma[4] = { ctx->msg0, ctx->msg[1], msg2_a, ctx->msg[3] };
+    __m128i mb[4] = { ctx->msg0, ctx->msg[1], msg2_b, ctx->msg[3] };
+    __m128i ka, kb, k, tmp;
+
+    /* Quad-rounds 0 and 1 are precomputed, start at W[8..11] */
+#pragma GCC unroll 14
+    for (int q = 2; q < 16; q++) {
+        k = _mm_loadu_si128((const __m128i *)&K[4 * q]);
+        ka = _mm_add_epi32(ma[q & 3], k);
+        kb = _mm_add_epi32(mb[q & 3], k);
+        s1a = _mm_sha256rnds2_epu32(s1a, s0a, ka);
+        s1b = _mm_sha256rnds2_epu32(s1b, s0b, kb);
+        if (q >= 3 && q <= 14) {
+            tmp = _mm_alignr_epi8(ma[q & 3], ma[(q - 1) & 3], 4);
+            ma[(q + 1) & 3] = _mm_sha256msg2_epu32(_mm_add_epi32(ma[(q + 1) & 3], tmp), ma[q & 3]);
+            tmp = _mm_alignr_epi8(mb[q & 3], mb[(q - 1) & 3], 4);
+            mb[(q + 1) & 3] = _mm_sha256msg2_epu32(_mm_add_epi32(mb[(q + 1) & 3], tmp), mb[q & 3]);
+        }
+        ka = _mm_shuffle_epi32(ka, 0x0E);
+        kb = _mm_shuffle_epi32(kb, 0x0E);
+        s0a = _mm_sha256rnds2_epu32(s0a, s1a, ka);
+        s0b = _mm_sha256rnds2_epu32(s0b, s1b, kb);
+        if (q >= 1 && q <= 12) {
+            ma[(q - 1) & 3] = _mm_sha256msg1_epu32(ma[(q - 1) & 3], ma[q & 3]);
+            mb[(q - 1) & 3] = _mm_sha256msg1_epu32(mb[(q - 1) & 3], mb[q & 3]);
+        }
+    }
+
+    shani_store_state(_mm_add_epi32(s0a, ctx->abef), _mm_add_epi32(s1a, ctx->cdgh), state_a);
+    shani_store_state(_mm_add_epi32(s0b, ctx->abef), _mm_add_epi32(s1b, ctx->cdgh), state_b);
+}
+
+/* ============================================================================
+ * AVX2 8-way multi-buffer SHA-256
+ * ============================================================================
+ * For CPUs without SHA-NI: each __m256i holds the same state/message word for
+ * eight independent messages, so one vectorised round advances eight hashes.
+ */
+#define AVX2 __attribute__((target("avx2")))
+
+#define V8_ROTR(x, n) _mm256_or_si256(_mm256_srli_epi32(x, n), _mm256_slli_epi32(x, 32 - (n)))
+#define V8_BSIG0(x) _mm256_xor_si256(_mm256_xor_si256(V8_ROTR(x, 2), V8_ROTR(x, 13)), V8_ROTR(x, 22))
+#define V8_BSIG1(x) _mm256_xor_si256(_mm256_xor_si256(V8_ROTR(x, 6), V8_ROTR(x, 11)), V8_ROTR(x, 25))
+#define V8_SSIG0(x) _mm256_xor_si256(_mm256_xor_si256(V8_ROTR(x, 7), V8_ROTR(x, 18)), _mm256_srli_epi32(x, 3))
+#define V8_SSIG1(x) _mm256_xor_si256(_mm256_xor_si256(V8_ROTR(x, 17), V8_ROTR(x, 19)), _mm256_srli_epi32(x, 10))
+
+#define V8_ADD _mm256_add_epi32
+#define V8_SET1(x) _mm256_set1_epi32((int)(x))
+#define V8_CH(e, f, g) _mm256_xor_si256(_mm256_and_si256(e, f), _mm256_andnot_si256(e, g))
+#define V8_MAJ(a, b, c) _mm256_or_si256(_mm256_and_si256(a, b), _mm256_and_si256(c, _mm256_or_si256(a, b)))
+
+DEFINE_SHA256_TAIL(sha256_tail_x8, AVX2, __m256i, V8)
+
+/* ============================================================================
+ * AVX-512 16-way multi-buffer SHA-256
+ * ============================================================================
+ * Same layout as the AVX2 kernel with sixteen lanes. AVX-512F adds native
+ * rotates and VPTERNLOGD, which evaluates Ch, Maj and the three-way XORs of
+ * the sigma functions in a single instruction each.
+ */
+#define AVX512 __attribute__((target("avx512f")))
+
+#define V16_XOR3(a, b, c) _mm512_ternarylogic_epi32(a, b, c, 0x96)
+#define V16_CH(e, f, g) _mm512_ternarylogic_epi32(e, f, g, 0xCA)
+#define V16_MAJ(a, b, c) _mm512_ternarylogic_epi32(a, b, c, 0xE8)
+#define V16_BSIG0(x) V16_XOR3(_mm512_ror_epi32(x, 2), _mm512_ror_epi32(x, 13), _mm512_ror_epi32(x, 22))
+#define V16_BSIG1(x) V16_XOR3(_mm512_ror_epi32(x, 6), _mm512_ror_epi32(x, 11), _mm512_ror_epi32(x, 25))
+#define V16_SSIG0(x) V16_XOR3(_mm512_ror_epi32(x, 7), _mm512_ror_epi32(x, 18), _mm512_srli_epi32(x, 3))
+#define V16_SSIG1(x) V16_XOR3(_mm512_ror_epi32(x, 17), _mm512_ror_epi32(x, 19), _mm512_srli_epi32(x, 10))
+
+#define V16_ADD _mm512_add_epi32
+#define V16_SET1(x) _mm512_set1_epi32((int)(x))
+
+DEFINE_SHA256_TAIL(sha256_tail_x16, AVX512, __m512i, V16)
+
+/* ============================================================================
+ * Nonce search
+ * ============================================================================ */
+typedef struct {
+    uint64_t nonce;
+    uint32_t hash[8];
+    int zeros;
+    uint64_t tried;
+} mine_result;
+
+typedef void (*mine_range_fn)(const uint32_t midstate[8], const uint8_t tail_template[64],
+                              uint64_t start_nonce, uint64_t count, int target_zeros,
+                              mine_result *res);
+
+/*
+ * Largest first state word whose hash could still beat best_zeros: any
+ * word above it has fewer than best_zeros + 1 leading zeros. Past 31 zeros
+ * the first word must be zero and the remaining words decide.
+ */
+static inline uint32_t zeros_threshold(int best_zeros)
+{
+    return best_zeros >= 31 ? 0 : 0xFFFFFFFFu >> (best_zeros + 1);
+}
+
+/* Record h if it beats the current best; returns 1 once the target is reached */
+static inline int check_candidate(mine_result *res, uint64_t nonce, const uint32_t h[8], int target_zeros)
+{
+    int zeros = clz256(h);
+
+    if (zeros <= res->zeros)
+        return 0;
+    res->zeros = zeros;
+    res->nonce = nonce;
+    memcpy(res->hash, h, 8 * sizeof(uint32_t));
+    return target_zeros && zeros >= target_zeros;
+}
+
+static void mine_range_scalar(const uint32_t midstate[8], const uint8_t tail_template[64],
+                              uint64_t start_nonce, uint64_t count, int target_zeros,
+                              mine_result *res)
+{
+    tail_ctx ctx;
+    uint32_t w8, w9, w10, h[8];
+    uint32_t threshold = zeros_threshold(res->zeros);
+
+    tail_ctx_init(&ctx, midstate, tail_template);
+    for (uint64_t i = 0; i < count; i++) {
+        uint64_t nonce = start_nonce + i;
+
+        tail_nonce_words(&ctx, nonce, &w8, &w9, &w10);
+        sha256_tail_x1(&ctx, w8, w9, w10, h);
+        if (h[0] > threshold)
+            continue;
+        if (check_candidate(res, nonce, h, target_zeros)) {
+            res->tried = i + 1;
+            return;
+        }
+        threshold = zeros_threshold(res->zeros);
+    }
+    res->tried = count;
+}
+
+static SHANI void mine_range_shani(const uint32_t midstate[8], const uint8_t tail_template[64],
+                                   uint64_t start_nonce, uint64_t count, int target_zeros,
+                                   mine_result *res)
+{
+    uint8_t tail[64];
+    uint32_t h[8];
+    uint32_t threshold = zeros_threshold(res->zeros);
+
+    memcpy(tail, tail_template, 64);
+    for (uint64_t i = 0; i < count; i++) {
+        uint64_t nonce = start_nonce + i;
+
+        store_be64(tail + TAIL_NONCE_OFFSET, nonce);
+        memcpy(h, midstate, sizeof(h));
+        sha256_compress_shani(h, tail);
+        if (h[0] > threshold)
+            continue;
+        if (check_candidate(res, nonce, h, target_zeros)) {
+            res->tried = i + 1;
+            return;
+        }
+        threshold = zeros_threshold(res->zeros);
+    }
+    res->tried = count;
+}
+
+/* Fastest single-nonce kernel, used for the leftovers of the multi-lane kernels */
+static mine_range_fn mine_range_1way = mine_range_scalar;
+
+static SHANI void mine_range_shani2(const uint32_t midstate[8], const uint8_t tail_template[64],
+                                    uint64_t start_nonce, uint64_t count, int target_zeros,
+                                    mine_result *res)
+{
+    shani_ctx ctx;
+    uint32_t ha[8], hb[8];
+    uint32_t threshold = zeros_threshold(res->zeros);
+    uint64_t i;
+
+    shani_ctx_init(&ctx, midstate, tail_template);
+    for (i = 0; i + 2 <= count; i += 2) {
+        uint64_t nonce = start_nonce + i;
+
+        sha256_compress_shani_x2(&ctx, shani_nonce_msg(&ctx, nonce), shani_nonce_msg(&ctx, nonce + 1),
+                                 ha, hb);
+        /* One branch for both streams in the common case where neither can win */
+        if (ha[0] > threshold && hb[0] > threshold)
+            continue;
+        if (check_candidate(res, nonce, ha, target_zeros)) {
+            res->tried = i + 1;
+            return;
+        }
+        if (check_candidate(res, nonce + 1, hb, target_zeros)) {
+            res->tried = i + 2;
+            return;
+        }
+        threshold = zeros_threshold(res->zeros);
+    }
+
+    /* Odd leftover nonce */
+    if (i < count) {
+        mine_range_1way(midstate, tail_template, start_nonce + i, count - i, target_zeros, res);
+        res->tried += i;
+        return;
+    }
+    res->tried = count;
+}
+
+/* Full state of one lane, only done for lanes that passed the threshold */
+static inline AVX2 void extract_lane_x8(const __m256i out[8], int lane, uint32_t h[8])
+{
+    const __m256i idx = _mm256_set1_epi32(lane);
+
+    for (int k = 0; k < 8; k++)
+        h[k] = (uint32_t)_mm256_cvtsi256_si32(_mm256_permutevar8x32_epi32(out[k], idx));
+}
+
+/* Nonce words W8..W10 for nonce .. nonce + 7, computed in registers */
+static inline AVX2 void nonce_words_x8(const tail_ctx *ctx, uint64_t nonce, __m256i w[3])
+{
+    const __m256i lanes = _mm256_setr_epi32(0, 1, 2, 3, 4, 5, 6, 7);
+    const __m256i bias = _mm256_set1_epi32((int)0x80000000);
+    __m256i lo = _mm256_add_epi32(_mm256_set1_epi32((int)(uint32_t)nonce), lanes);
+    /* Lanes whose low word wrapped around carry into the high word */
+    __m256i carry = _mm256_cmpgt_epi32(_mm256_xor_si256(lanes, bias), _mm256_xor_si256(lo, bias));
+    __m256i hi = _mm256_sub_epi32(_mm256_set1_epi32((int)(uint32_t)(nonce >> 32)), carry);
+
+    w[0] = _mm256_or_si256(_mm256_set1_epi32((int)ctx->w[8]), _mm256_srli_epi32(hi, 8));
+    w[1] = _mm256_or_si256(_mm256_slli_epi32(hi, 24), _mm256_srli_epi32(lo, 8));
+    w[2] = _mm256_or_si256(_mm256_set1_epi32((int)ctx->w[10]), _mm256_slli_epi32(lo, 24));
+}
+
+static AVX2 void mine_range_avx2(const uint32_t midstate[8], const uint8_t tail_template[64],
+                                  uint64_t start_nonce, uint64_t count, int target_zeros,
+                                  mine_result *res)
+{
+    const __m256i bias = _mm256_set1_epi32((int)0x80000000);
+    __m256i w[3], out[8], threshold;
+    tail_ctx ctx;
+    uint32_t h[8];
+    uint64_t i;
+
+    tail_ctx_init(&ctx, midstate, tail_template);
+    threshold = _mm256_set1_epi32((int)(zeros_threshold(res->zeros) ^ 0x80000000));
+
+    for (i = 0; i + 8 <= count; i += 8) {
+        uint64_t nonce = start_nonce + i;
+        unsigned candidates;
+
+        nonce_words_x8(&ctx, nonce, w);
+        sha256_tail_x8(&ctx, w[0], w[1], w[2], out);
+
+        /* Lanes whose first word is <= threshold (unsigned compare via sign bias) */
+        candidates = ~(unsigned)_mm256_movemask_ps(_mm256_castsi256_ps(
+            _mm256_cmpgt_epi32(_mm256_xor_si256(out[0], bias), threshold))) & 0xFF;
+
+        while (candidates) {
+            int l = __builtin_ctz(candidates);
+
+            candidates &= candidates - 1;
+            extract_lane_x8(out, l, h);
+            if (check_candidate(res, nonce + l, h, target_zeros)) {
+                res->tried = i + l + 1;
+                return;
+            }
+            threshold = _mm256_set1_epi32((int)(zeros_threshold(res->zeros) ^ 0x80000000));
+        }
+    }
+
+    /* Leftover nonces */
+    if (i < count) {
+        mine_range_1way(midstate, tail_template, start_nonce + i, count - i, target_zeros, res);
+        res->tried += i;
+        return;
+    }
+    res->tried = count;
+}
+
+/* Below this many nonces the batch setup is not worth it, use the 1-way kernel */
+#define AVX512_MIN_BATCH 32
+
+/* Nonce words W8..W10 for nonce .. nonce + 15, see nonce_words_x8 */
+static inline AVX512 void nonce_words_x16(const tail_ctx *ctx, uint64_t nonce, __m512i w[3])
+{
+    const __m512i lanes = _mm512_setr_epi32(0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15);
+    __m512i lo = _mm512_add_epi32(_mm512_set1_epi32((int)(uint32_t)nonce), lanes);
+    __m512i hi = _mm512_set1_epi32((int)(uint32_t)(nonce >> 32));
+
+    /* Lanes whose low word wrapped around carry into the high word */
+    hi = _mm512_mask_add_epi32(hi, _mm512_cmplt_epu32_mask(lo, lanes), hi, _mm512_set1_epi32(1));
+    w[0] = _mm512_or_si512(_mm512_set1_epi32((int)ctx->w[8]), _mm512_srli_epi32(hi, 8));
+    w[1] = _mm512_or_si512(_mm512_slli_epi32(hi, 24), _mm512_srli_epi32(lo, 8));
+    w[2] = _mm512_or_si512(_mm512_set1_epi32((int)ctx->w[10]), _mm512_slli_epi32(lo, 24));
+}
+
+static inline AVX512 void extract_lane_x16(const __m512i out[8], int lane, uint32_t h[8])
+{
+    const __m512i idx = _mm512_set1_epi32(lane);
+
+    for (int k = 0; k < 8; k++)
+        h[k] = (uint32_t)_mm_cvtsi128_si32(_mm512_castsi512_si128(_mm512_permutexvar_epi32(idx, out[k])));
+}
+
+static AVX512 void mine_range_avx512(const uint32_t midstate[8], const uint8_t tail_template[64],
+                                     uint64_t start_nonce, uint64_t count, int target_zeros,
+                                     mine_result *res)
+{
+    __m512i w[3], out[8], threshold;
+    tail_ctx ctx;
+    uint32_t h[8];
+    uint64_t i = 0;
+
+    if (count < AVX512_MIN_BATCH) {
+        mine_range_1way(midstate, tail_template, start_nonce, count, target_zeros, res);
+        return;
+    }
+
+    tail_ctx_init(&ctx, midstate, tail_template);
+    threshold = _mm512_set1_epi32((int)zeros_threshold(res->zeros));
+
+    for (; i + 16 <= count; i += 16) {
+        uint64_t nonce = start_nonce + i;
+        unsigned candidates;
+
+        nonce_words_x16(&ctx, nonce, w);
+        sha256_tail_x16(&ctx, w[0], w[1], w[2], out);
+
+        /* Only lanes whose first word is <= threshold can beat the best */
+        candidates = _mm512_cmple_epu32_mask(out[0], threshold);
+
+        while (candidates) {
+            int l = __builtin_ctz(candidates);
+
+            candidates &= candidates - 1;
+            extract_lane_x16(out, l, h);
+            if (check_candidate(res, nonce + l, h, target_zeros)) {
+                res->tried = i + l + 1;
+                return;
+            }
+            threshold = _mm512_set1_epi32((int)zeros_threshold(res->zeros));
+        }
+    }
+
+    /* Leftover nonces */
+    if (i < count) {
+        mine_range_1way(midstate, tail_template, start_nonce + i, count - i, target_zeros, res);
+        res->tried += i;
+        return;
+    }
+    res->tried = count;
+}
+
+/* ============================================================================
+ * Backend dispatch
+ * ============================================================================
+ * Which backend wins depends on the microarchitecture (multi-buffer AVX2 can
+ * beat SHA-NI on some parts and lose on others), so every supported backend
+ * is timed on a short run at import and the fastest one is picked. The table
+ * order is the usual ranking and only breaks ties.
+ *
+ * The batch size is the number of nonces the Python side should hand to
+ * mine_range per call: about BATCH_SECONDS of work for the chosen backend,
+ * enough to amortise the call overhead while keeping progress responsive.
+ */
+#define CALIBRATION_NONCES 8192
+#define CALIBRATION_RUNS 3
+#define BATCH_SECONDS 0.05
+#define MIN_BATCH (1ULL << 12)
+#define MAX_BATCH (1ULL << 24)
+
+typedef struct {
+    const char *name;
+    mine_range_fn fn;
+    int supported;
+    double rate;            /* hashes per second measured at import */
+} mine_backend;
+
+static mine_backend backends[] = {
+    {"avx512-16way", mine_range_avx512, 0, 0.0},
+    {"sha-ni-2way", mine_range_shani2, 0, 0.0},
+    {"sha-ni", mine_range_shani, 0, 0.0},
+    {"avx2-8way", mine_range_avx2, 0, 0.0},
+    {"scalar", mine_range_scalar, 1, 0.0},
+};
+
+static mine_backend *active_backend = &backends[4];
+static unsigned long long batch_size = MIN_BATCH;
+
+static double elapsed_seconds(const struct timespec *start)
+{
+    struct timespec now;
+
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (double)(now.tv_sec - start->tv_sec) + (double)(now.tv_nsec - start->tv_nsec) * 1e-9;
+}
+
+/* Hashes per second of fn, best of CALIBRATION_RUNS short runs */
+static double measure_backend(mine_range_fn fn)
+{
+    uint8_t tail[64] = {0};
+    double best = 0.0;
+
+    memcpy(tail + TAIL_NONCE_OFFSET + 8, TAIL_PADDING, sizeof(TAIL_PADDING));
+    for (int run = 0; run < CALIBRATION_RUNS; run++) {
+        struct timespec start;
+        mine_result res;
+        double seconds;
+
+        /* Nothing beats 256 zeros, so no run takes the candidate path */
+        memset(&res, 0, sizeof(res));
+        res.zeros = 256;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        fn(H0, tail, (uint64_t)run * CALIBRATION_NONCES, CALIBRATION_NONCES, 0, &res);
+        seconds = elapsed_seconds(&start);
+        if (seconds > 0 && CALIBRATION_NONCES / seconds > best)
+            best = CALIBRATION_NONCES / seconds;
+    }
+    return best;
+}
+
+/* Largest power of two that keeps one call under BATCH_SECONDS */
+static unsigned long long default_batch(const mine_backend *backend)
+{
+    unsigned long long batch = MIN_BATCH;
+
+    while (batch < MAX_BATCH && 2 * batch <= backend->rate * BATCH_SECONDS)
+        batch *= 2;
+    return batch;
+}
+
+static void select_backend(void)
+{
+    int have_sha, have_avx2, have_avx512;
+
+    __builtin_cpu_init();
+    have_sha = __builtin_cpu_supports("sha") && __builtin_cpu_supports("sse4.1");
+    have_avx2 = __builtin_cpu_supports("avx2");
+    have_avx512 = __builtin_cpu_supports("avx512f");
+
+    backends[0].supported = have_avx512;
+    backends[1].supported = have_sha;
+    backends[2].supported = have_sha;
+    backends[3].supported = have_avx2;
+    if (have_sha)
+        mine_range_1way = mine_range_shani;
+
+    for (size_t i = 0; i < sizeof(backends) / sizeof(backends[0]); i++) {
+        if (!backends[i].supported)
+            continue;
+        backends[i].rate = measure_backend(backends[i].fn);
+        if (backends[i].rate > active_backend->rate)
+            active_backend = &backends[i];
+    }
+    batch_size = default_batch(active_backend);
+}
+
+/* ============================================================================
+ * Python bindings
+ * ============================================================================ */
+static PyObject *py_midstate(PyObject *self, PyObject *args)
+{
+    const uint8_t *block;
+    Py_ssize_t block_len;
+    uint32_t state[8];
+    uint8_t out[32];
+
+    if (!PyArg_ParseTuple(args, "y#", &block, &block_len))
+        return NULL;
+    if (block_len != 64) {
+        PyErr_SetString(PyExc_ValueError, "block must be 64 bytes");
+        return NULL;
+    }
+
+    memcpy(state, H0, sizeof(state));
+    sha256_compress_scalar(state, block);
+    for (int i = 0; i < 8; i++)
+        store_be32(out + 4 * i, state[i]);
+    return PyBytes_FromStringAndSize((const char *)out, 32);
+}
+
+static PyObject *mine_range_common(PyObject *args, mine_range_fn fn)
+{
+    const uint8_t *midstate_bytes, *tail;
+    Py_ssize_t midstate_len, tail_len;
+    unsigned long long start_nonce, count;
+    int best_zeros, target_zeros = 0;
+    uint32_t midstate[8];
+    mine_result res;
+    uint8_t digest[32];
+
+    if (!PyArg_ParseTuple(args, "y#y#KKi|i", &midstate_bytes, &midstate_len, &tail, &tail_len,
+                          &start_nonce, &count, &best_zeros, &target_zeros))
+        return NULL;
+    if (midstate_len != 32 || tail_len != 64) {
+        PyErr_SetString(PyExc_ValueError, "midstate must be 32 bytes and tail_template 64 bytes");
+        return NULL;
+    }
+    if (memcmp(tail + TAIL_NONCE_OFFSET + 8, TAIL_PADDING, sizeof(TAIL_PADDING)) != 0) {
+        PyErr_SetString(PyExc_ValueError, "tail_template must be padded for a 105-byte message");
+        return NULL;
+    }
+
+    for (int i = 0; i < 8; i++)
+        midstate[i] = load_be32(midstate_bytes + 4 * i);
+    memset(&res, 0, sizeof(res));
+    res.zeros = best_zeros;
+
+    Py_BEGIN_ALLOW_THREADS
+    fn(midstate, tail, start_nonce, count, target_zeros, &res);
+    Py_END_ALLOW_THREADS
+
+    if (res.zeros <= best_zeros)
+        return Py_BuildValue("(OOiK)", Py_None, Py_None, best_zeros, (unsigned long long)res.tried);
+
+    for (int i = 0; i < 8; i++)
+        store_be32(digest + 4 * i, res.hash[i]);
+    return Py_BuildValue("(Ky#iK)", (unsigned long long)res.nonce, (const char *)digest,
+                         (Py_ssize_t)32, res.zeros, (unsigned long long)res.tried);
+}
+
+static PyObject *py_mine_range(PyObject *self, PyObject *args)
+{
+    return mine_range_common(args, active_backend->fn);
+}
+
+static PyObject *py_backend_name(PyObject *self, PyObject *args)
+{
+    return PyUnicode_FromString(active_backend->name);
+}
+
+static PyObject *py_backends(PyObject *self, PyObject *args)
+{
+    PyObject *names = PyList_New(0);
+
+    if (!names)
+        return NULL;
+    for (size_t i = 0; i < sizeof(backends) / sizeof(backends[0]); i++) {
+        PyObject *name;
+
+        if (!backends[i].supported)
+            continue;
+        name = PyUnicode_FromString(backends[i].name);
+        if (!name || PyList_Append(names, name) < 0) {
+            Py_XDECREF(name);
+            Py_DECREF(names);
+            return NULL;
+        }
+        Py_DECREF(name);
+    }
+    return names;
+}
+
+static PyObject *py_set_backend(PyObject *self, PyObject *args)
+{
+    const char *name;
+
+    if (!PyArg_ParseTuple(args, "s", &name))
+        return NULL;
+    for (size_t i = 0; i < sizeof(backends) / sizeof(backends[0]); i++) {
+        if (strcmp(backends[i].name, name) != 0)
+            continue;
+        if (!backends[i].supported) {
+            PyErr_Format(PyExc_ValueError, "backend '%s' is not supported by this CPU", name);
+            return NULL;
+        }
+        active_backend = &backends[i];
+        batch_size = default_batch(active_backend);
+        Py_RETURN_NONE;
+    }
+    PyErr_Format(PyExc_ValueError, "unknown backend '%s'", name);
+    return NULL;
+}
+
+static PyObject *py_batch_size(PyObject *self, PyObject *args)
+{
+    return PyLong_FromUnsignedLongLong(batch_size);
+}
+
+static PyObject *py_set_batch(PyObject *self, PyObject *args)
+{
+    Py_ssize_t size;
+
+    /* "n" raises OverflowError instead of wrapping like "K" */
+    if (!PyArg_ParseTuple(args, "n", &size))
+        return NULL;
+    if (size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "batch size must be positive");
+        return NULL;
+    }
+    batch_size = size;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef miner_ext_methods[] = {
+    {"midstate", py_midstate, METH_VARARGS,
+     "midstate(block) -> SHA-256 state (32 bytes) after compressing one 64-byte block."},
+    {"mine_range", py_mine_range, METH_VARARGS,
+     "mine_range(midstate, tail_template, start_nonce, count, best_zeros[, target_zeros])\n"
+     "-> (best_nonce, best_hash, best_zeros, tried)\n\n"
+     "Hash `count` nonces starting at `start_nonce` and return the best one that beats\n"
+     "`best_zeros` (nonce and hash are None if none did). Stops early once\n"
+     "`target_zeros` is reached; `tried` is the number of nonces actually hashed."},
+    {"backend_name", py_backend_name, METH_NOARGS,
+     "backend_name() -> name of the backend used by mine_range."},
+    {"backends", py_backends, METH_NOARGS,
+     "backends() -> names of the backends this CPU supports, in table order."},
+    {"set_backend", py_set_backend, METH_VARARGS,
+     "set_backend(name) -> force mine_range to use the given backend (resets the batch size)."},
+    {"batch_size", py_batch_size, METH_NOARGS,
+     "batch_size() -> nonces to pass to mine_range per call for the active backend."},
+    {"set_batch", py_set_batch, METH_VARARGS,
+     "set_batch(size) -> override the batch size reported by batch_size()."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef miner_ext_module = {
+    PyModuleDef_HEAD_INIT, "miner_ext", "SQLChain native mining kernel", -1, miner_ext_methods
+};
+
+PyMODINIT_FUNC PyInit_miner_ext(void)
+{
+    select_backend();
+    return PyModule_Create(&miner_ext_module);
+}
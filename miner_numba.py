@@ -0,0 +1,199 @@
+"""
+SQLChain Miner - Numba fallback kernel
+JIT-compiled SHA-256 nonce search for machines that cannot build miner_ext.
+Requires numba and numpy.
+
+Exposes the same midstate() / mine_range() / batch_size() interface as the
+native miner_ext module, so miner.py uses it in its place when the C
+extension is missing.
+"""
+
+import numpy as np
+from numba import njit, types
+
+# De Bruijn sequence for 64-bit bit scans: (2^i * DEBRUIJN64) >> 58 is unique per i
+DEBRUIJN64 = np.uint64(0x03F79D71B4CB0A89)
+DEBRUIJN_INDEX = np.zeros(64, dtype=np.uint8)
+for _i in range(64):
+    DEBRUIJN_INDEX[((int(DEBRUIJN64) << _i) & 0xFFFFFFFFFFFFFFFF) >> 58] = _i
+
+K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.uint32)
+
+H0 = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.uint32)
+
+# Numba widens uint32 arithmetic to 64 bits, results are masked back
+M32 = np.uint64(0xFFFFFFFF)
+
+# Nonces per mine_range call, see miner_ext.batch_size()
+batch = 1 << 18
+
+
+@njit(cache=True)
+def clz64(w):
+    """Count leading zero bits of a non-zero uint64 without branching."""
+    # Smear the highest set bit downwards, then keep only that bit
+    w |= w >> np.uint64(1)
+    w |= w >> np.uint64(2)
+    w |= w >> np.uint64(4)
+    w |= w >> np.uint64(8)
+    w |= w >> np.uint64(16)
+    w |= w >> np.uint64(32)
+    msb = w ^ (w >> np.uint64(1))
+    return 63 - np.int64(DEBRUIJN_INDEX[(msb * DEBRUIJN64) >> np.uint64(58)])
+
+
+@njit(cache=True)
+def clz256_words(h):
+    """
+    Count leading zero bits of a digest held as eight uint32 state words.
+    The words are paired into four uint64; only the first non-zero one
+    needs a bit scan.
+    """
+    for i in range(4):
+        w = (np.uint64(h[2 * i]) << np.uint64(32)) | np.uint64(h[2 * i + 1])
+        if w != 0:
+            return 64 * i + clz64(w)
+    return 256
+
+
+@njit(cache=True)
+def rotr(x, n):
+    return ((x >> np.uint64(n)) | (x << np.uint64(32 - n))) & M32
+
+
+@njit(cache=True)
+def compress(state, w, out):
+    """
+    SHA-256 compression of the 16 message words in w[0..15] (w holds 64
+    words, the schedule is expanded in place) starting from state.
+    """
+    for i in range(16, 64):
+        x = np.uint64(w[i - 15])
+        y = np.uint64(w[i - 2])
+        s0 = rotr(x, 7) ^ rotr(x, 18) ^ (x >> np.uint64(3))
+        s1 = rotr(y, 17) ^ rotr(y, 19) ^ (y >> np.uint64(10))
+        w[i] = (np.uint64(w[i - 16]) + s0 + np.uint64(w[i - 7]) + s1) & M32
+
+    a = np.uint64(state[0])
+    b = np.uint64(state[1])
+    c = np.uint64(state[2])
+    d = np.uint64(state[3])
+    e = np.uint64(state[4])
+    f = np.uint64(state[5])
+    g = np.uint64(state[6])
+    h = np.uint64(state[7])
+    for i in range(64):
+        s1 = rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)
+        ch = (e & f) ^ (~e & g & M32)
+        t1 = (h + s1 + ch + np.uint64(K[i]) + np.uint64(w[i])) & M32
+        s0 = rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        t2 = (s0 + maj) & M32
+        h = g
+        g = f
+        f = e
+        e = (d + t1) & M32
+        d = c
+        c = b
+        b = a
+        a = (t1 + t2) & M32
+
+    out[0] = (np.uint64(state[0]) + a) & M32
+    out[1] = (np.uint64(state[1]) + b) & M32
+    out[2] = (np.uint64(state[2]) + c) & M32
+    out[3] = (np.uint64(state[3]) + d) & M32
+    out[4] = (np.uint64(state[4]) + e) & M32
+    out[5] = (np.uint64(state[5]) + f) & M32
+    out[6] = (np.uint64(state[6]) + g) & M32
+    out[7] = (np.uint64(state[7]) + h) & M32
+
+
+# Compiled eagerly at import so forked mining workers inherit the machine code
+@njit(types.Tuple((types.uint64, types.uint32[:], types.int64, types.uint64))(
+    types.uint32[:], types.uint32[:], types.uint64, types.uint64, types.int64, types.int64),
+    cache=True)
+def mine_range_words(midstate, tail, start_nonce, count, best_zeros, target_zeros):
+    """
+    Nonce search over native-endian state/tail words, the nonce goes into
+    tail words 8..10. Returns (nonce, hash words, zeros, tried); zeros stays
+    at best_zeros when nothing beat it.
+    """
+    w = np.zeros(64, dtype=np.uint32)
+    h = np.zeros(8, dtype=np.uint32)
+    best = np.zeros(8, dtype=np.uint32)
+    best_nonce = np.uint64(0)
+    # Largest first word that can still beat best_zeros, as in miner_ext
+    threshold = np.uint64(0) if best_zeros >= 31 else M32 >> np.uint64(best_zeros + 1)
+
+    for i in range(count):
+        nonce = start_nonce + np.uint64(i)
+        w[:16] = tail
+        w[8] = (np.uint64(tail[8]) & np.uint64(0xff000000)) | (nonce >> np.uint64(40))
+        w[9] = (nonce >> np.uint64(8)) & M32
+        w[10] = ((nonce & np.uint64(0xff)) << np.uint64(24)) | (np.uint64(tail[10]) & np.uint64(0x00ffffff))
+        compress(midstate, w, h)
+        if np.uint64(h[0]) > threshold:
+            continue
+
+        zeros = clz256_words(h)
+        if zeros > best_zeros:
+            best_zeros = zeros
+            best_nonce = nonce
+            best[:] = h
+            threshold = np.uint64(0) if best_zeros >= 31 else M32 >> np.uint64(best_zeros + 1)
+            if target_zeros and zeros >= target_zeros:
+                return best_nonce, best, best_zeros, np.uint64(i + 1)
+
+    return best_nonce, best, best_zeros, np.uint64(count)
+
+
+def backend_name() -> str:
+    return "numba"
+
+
+def batch_size() -> int:
+    return batch
+
+
+def set_batch(size: int):
+    global batch
+    if size <= 0:
+        raise ValueError("batch size must be positive")
+    batch = size
+
+
+def midstate(block: bytes) -> bytes:
+    """SHA-256 state (32 bytes) after compressing one 64-byte block."""
+    if len(block) != 64:
+        raise ValueError("block must be 64 bytes")
+    w = np.zeros(64, dtype=np.uint32)
+    w[:16] = np.frombuffer(block, dtype='>u4')
+    out = np.zeros(8, dtype=np.uint32)
+    compress(H0, w, out)
+    return out.astype('>u4').tobytes()
+
+
+def mine_range(midstate: bytes, tail_template: bytes, start_nonce: int, count: int,
+               best_zeros: int, target_zeros: int = 0):
+    """
+    Hash count nonces from start_nonce, same contract as miner_ext.mine_range:
+    returns (best_nonce, best_hash, best_zeros, tried) with nonce and hash set
+    to None when nothing beat best_zeros.
+    """
+    state = np.frombuffer(midstate, dtype='>u4').astype(np.uint32)
+    tail = np.frombuffer(tail_template, dtype='>u4').astype(np.uint32)
+    nonce, digest, zeros, tried = mine_range_words(state, tail, start_nonce, count, best_zeros, target_zeros)
+    if zeros <= best_zeros:
+        return None, None, best_zeros, int(tried)
+    return int(nonce), digest.astype('>u4').tobytes(), int(zeros), int(tried)